@@ -1,114 +1,206 @@
 import asyncio
 import csv
+import logging
 import os
-from playwright.async_api import async_playwright
+import re
+from html import escape
+import httpx
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError, async_playwright
 
 EXAMSYS_BASE = "https://examsys.nottingham.ac.uk"
 REPORT_URL = f"{EXAMSYS_BASE}/reports/textbox_select_q.php?action=mark&phase=1&paperID=47081&startdate=20251013091500&enddate=20251031120000&repmodule=&repcourse=%&sortby=name&module=2544&folder=&percent=100&absent=0&studentsonly=1&ordering=asc"
 OUTPUT_CSV = "exam_feedback_by_question.csv"
 
+log = logging.getLogger(__name__)
+
 QUESTION_LINK_SEL = "a[href*='textbox_marking.php']"
 STUDENT_BLOCKS_SEL = "div.student-answer-block.marked"
 HEADER_SEL = "p.theme"
 ANSWER_SEL = "div.student_ans"
-MARK_SEL = "select[id^='mark'] option:checked"
+MARK_SEL = "select[id^='mark']"  # selected option is read from the <select>
 COMMENT_SEL = "textarea[id^='comment']"
 USERNAME_SEL = "input[id^='username']"  # hidden input with student ID
 
+CONCURRENCY = 6  # question tabs open at once
+HEADLESS = os.environ.get("HEADLESS", "1") != "0"  # HEADLESS=0 to watch the run
+VERBOSE = os.environ.get("VERBOSE", "0") == "1"  # VERBOSE=1 to log every student row
+FLUSH_ROWS = 500  # CSV rows buffered before each writerows()
+BLOCKED_RESOURCES = {"image", "font", "media"}  # never read, so never fetched (CSS stays: innerText depends on it)
+
+# Pulls every field for every matched student block in one round-trip to the browser.
+# One combined querySelectorAll per block walks its subtree once; the first
+# match for each field wins, as querySelector would. The selectors are passed
+# in as an argument so the script source stays identical between calls.
+EXTRACT_BLOCKS_JS = """
+(bs, [selHdr, selUser, selAns, selMark, selComm]) => {
+    const sel = [selHdr, selUser, selAns, selMark, selComm].join(', ');
+    return bs.map(b => {
+        const out = {};
+        for (const e of b.querySelectorAll(sel)) {
+            if (e.matches(selUser)) out.student_id ??= e.value;
+            else if (e.matches(selComm)) out.comment ??= e.value.trim();
+            else if (e.matches(selMark)) out.mark ??= (e.options[e.selectedIndex]?.text ?? e.value).trim();
+            else if (e.matches(selHdr)) out.label ??= e.innerText.trim();
+            else out.answer ??= e.innerText.trim();
+        }
+        return {label: '', student_id: '', answer: '', mark: '', comment: '', ...out};
+    });
+}
+"""
+EXTRACT_BLOCKS_ARGS = [HEADER_SEL, USERNAME_SEL, ANSWER_SEL, MARK_SEL, COMMENT_SEL]
+
+
+async def block_assets(route):
+    if route.request.resource_type in BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def scrape_one(ctx, q, sem):
+    # one bad page must not sink the run: log it and give the question no rows
+    async with sem:
+        page = None
+        try:
+            page = await ctx.new_page()
+            await page.goto(q["href"], wait_until="domcontentloaded")
+
+            # wait for all student blocks to load
+            try:
+                await page.wait_for_selector(STUDENT_BLOCKS_SEL, state="attached", timeout=10000)
+            except PlaywrightTimeoutError:
+                log.warning("⚠️ Question %d (%s): no student blocks found, skipping.", q["idx"], q["label"])
+                return []
+
+            rows = await page.locator(STUDENT_BLOCKS_SEL).evaluate_all(EXTRACT_BLOCKS_JS, EXTRACT_BLOCKS_ARGS)
+            log.info("✅ Question %d (%s): found %d student blocks", q["idx"], q["label"], len(rows))
+            return rows
+        except Exception as e:
+            log.error("❌ Question %d (%s): failed (%s), skipping.", q["idx"], q["label"], e)
+            q["failed"] = True
+            return []
+        finally:
+            if page:
+                await page.close()
+
+
+_HEAD_RE = re.compile(r"<head(\s[^>]*)?>", re.I)
+
+
+async def render_blocks(render_ctx, q, html, sem):
+    # innerText is only the on-screen text once the page is laid out, so the
+    # fetched HTML goes into a real tab (scripts off, see main) and is read with
+    # the same extractor as scrape_one. The <base> lets its stylesheets resolve.
+    base = f'<base href="{escape(q["href"])}">'
+    html, n = _HEAD_RE.subn(lambda m: m.group(0) + base, html, count=1)
+    async with sem:
+        page = await render_ctx.new_page()
+        try:
+            await page.set_content(html if n else base + html)
+            return await page.locator(STUDENT_BLOCKS_SEL).evaluate_all(EXTRACT_BLOCKS_JS, EXTRACT_BLOCKS_ARGS)
+        finally:
+            await page.close()
+
+
+async def fetch_one(client, ctx, render_ctx, q, sem):
+    # marking pages are server-rendered, so a plain GET with the session
+    # cookies is enough; fall back to a real tab if the HTML has no blocks
+    try:
+        async with sem:
+            resp = await client.get(q["href"])
+        resp.raise_for_status()
+        rows = await render_blocks(render_ctx, q, resp.text, sem)
+    except Exception as e:
+        log.warning("⚠️ Question %d (%s): HTTP fetch failed (%s), using browser.", q["idx"], q["label"], e)
+        rows = []
+
+    if not rows:
+        return await scrape_one(ctx, q, sem)
+
+    log.info("✅ Question %d (%s): found %d student blocks", q["idx"], q["label"], len(rows))
+    return rows
+
+
+async def bootstrap_login(pw):
+    # headed browser used only to capture the SSO session into state.json
+    browser = await pw.chromium.launch(headless=False)
+    ctx = await browser.new_context()
+    page = await ctx.new_page()
+    await page.goto(EXAMSYS_BASE)
+    input("🔐 Log in via SSO, then press ENTER here… ")
+    await ctx.storage_state(path="state.json")
+    await browser.close()
+
 
 async def main():
     async with async_playwright() as pw:
-        browser = await pw.chromium.launch(headless=False, slow_mo=100)
-        ctx = (
-            await browser.new_context(storage_state="state.json")
-            if os.path.exists("state.json")
-            else await browser.new_context()
-        )
-        page = await ctx.new_page()
-
         # --- login if needed
         if not os.path.exists("state.json"):
-            await page.goto(EXAMSYS_BASE)
-            input("🔐 Log in via SSO, then press ENTER here… ")
-            await ctx.storage_state(path="state.json")
-
-        await page.goto(REPORT_URL, wait_until="domcontentloaded")
-        print("Page title:", await page.title())
-
-        links = await page.locator(QUESTION_LINK_SEL).all()
-        print(f"Found {len(links)} questions.")
-        if not links:
-            await browser.close()
-            return
-
-        with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["question_number", "student_id", "student_label", "student_answer", "mark", "comment"])
-
-            # ---- iterate through each question
-            for qi in range(len(links)):
-                print(f"\nProcessing Question {qi+1}/{len(links)}")
-
-                cur_links = await page.locator(QUESTION_LINK_SEL).all()
-                if qi >= len(cur_links):
-                    break
+            await bootstrap_login(pw)
 
-                await cur_links[qi].click()
-                await page.wait_for_load_state("domcontentloaded")
-                await page.wait_for_timeout(1500)
-
-                # wait for all student blocks to load
-                try:
-                    await page.wait_for_selector(STUDENT_BLOCKS_SEL, timeout=10000)
-                except:
-                    print("⚠️ No student blocks found, skipping.")
-                    continue
-
-                blocks = page.locator(STUDENT_BLOCKS_SEL)
-                count = await blocks.count()
-                print(f"✅ Found {count} student blocks")
+        # harvest always starts from the saved session
+        browser = await pw.chromium.launch(headless=HEADLESS)
+        ctx = await browser.new_context(storage_state="state.json")
+        page = await ctx.new_page()
 
-                for si in range(count):
-                    block = blocks.nth(si)
+        # only text is scraped from here on; skip images, fonts and media
+        await ctx.route("**/*", block_assets)
 
-                    # Extract student label, ID, answer, mark, and comment
-                    try:
-                        label = (await block.locator(HEADER_SEL).inner_text()).strip()
-                    except:
-                        label = f"Student {si+1}"
+        # tabs that lay out HTML fetched over HTTP; the marking page's own scripts
+        # are not run there (page.evaluate still works with JavaScript disabled)
+        render_ctx = await browser.new_context(storage_state="state.json", java_script_enabled=False)
+        await render_ctx.route("**/*", block_assets)
 
-                    try:
-                        student_id = (await block.locator(USERNAME_SEL).get_attribute("value")) or ""
-                    except:
-                        student_id = ""
+        await page.goto(REPORT_URL, wait_until="domcontentloaded")
+        log.info("Page title: %s", await page.title())
 
-                    try:
-                        answer = (await block.locator(ANSWER_SEL).inner_text()).strip()
-                    except:
-                        answer = ""
+        # question number and link text are fixed here, before any concurrent work
+        questions = await page.locator(QUESTION_LINK_SEL).evaluate_all(
+            "els => els.map((e, i) => ({href: e.href, label: e.innerText.trim(), idx: i + 1}))"
+        )
+        log.info("Found %d questions.", len(questions))
+        if not questions:
+            await browser.close()
+            return
 
-                    try:
-                        mark = (await block.locator(MARK_SEL).inner_text()).strip()
-                    except:
-                        mark = ""
+        # ---- fetch every question concurrently over HTTP, reusing the browser's session
+        jar = httpx.Cookies()
+        for c in await ctx.cookies():
+            jar.set(c["name"], c["value"], domain=c["domain"], path=c["path"])
 
-                    try:
-                        comment = (await block.locator(COMMENT_SEL).input_value()).strip()
-                    except:
-                        comment = ""
+        # keep-alive pool sized to the semaphore so every fetch reuses a warm connection
+        limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+        headers = {"User-Agent": await page.evaluate("navigator.userAgent")}
 
-                    writer.writerow([qi+1, student_id, label, answer, mark, comment])
-                    print(f"  ✅ {label} ({student_id}) | mark={mark} | ans={len(answer)} | comm={len(comment)}")
+        sem = asyncio.Semaphore(CONCURRENCY)
+        async with httpx.AsyncClient(cookies=jar, headers=headers, limits=limits, follow_redirects=True) as client:
+            results = await asyncio.gather(*[fetch_one(client, ctx, render_ctx, q, sem) for q in questions])
 
-                print(f"Finished Question {qi+1} ({count} students).")
+        with open(OUTPUT_CSV, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(["question_number", "student_id", "student_label", "student_answer", "mark", "comment"])
 
-                # return to question list
-                await page.goto(REPORT_URL, wait_until="domcontentloaded")
-                await page.wait_for_timeout(1000)
+            buf = []
+            for q, rows in zip(questions, results):
+                for si, r in enumerate(rows):
+                    label = r["label"] or f"Student {si+1}"
+                    buf.append([q["idx"], r["student_id"], label, r["answer"], r["mark"], r["comment"]])
+                    log.debug("  ✅ Q%d %s (%s) | mark=%s | ans=%d | comm=%d",
+                              q["idx"], label, r["student_id"], r["mark"], len(r["answer"]), len(r["comment"]))
+                if len(buf) >= FLUSH_ROWS:
+                    writer.writerows(buf)
+                    buf.clear()
+            writer.writerows(buf)
 
         await browser.close()
-        print(f"\n✅ Done. Results saved to {OUTPUT_CSV}")
+        failed = [q["idx"] for q in questions if q.get("failed")]
+        if failed:
+            log.warning("⚠️ %d question(s) could not be read and have no rows: %s", len(failed), failed)
+        log.info("✅ Done. Results saved to %s", OUTPUT_CSV)
 
 
 if __name__ == "__main__":
+    # root stays at WARNING so httpx/httpcore/asyncio don't log every request; only ours is raised
+    logging.basicConfig(format="%(message)s")
+    log.setLevel(logging.DEBUG if VERBOSE else logging.INFO)
     asyncio.run(main())
\ No newline at end of file
@@ -20,7 +20,8 @@
 # Import packages - these should be present in conda env
 # -----------------------------------------------------------
 from nicegui import ui, app
-import asyncio, csv, os, time, re, sys, traceback, warnings
+import asyncio, atexit, csv, os, queue, time, re, sys, traceback, warnings
+import orjson # fast json, installed alongside nicegui
 from pathlib import Path
 
 # ------------------------------------------------------------
@@ -52,8 +53,152 @@ MARK_SEL            = "select[id^='mark'] option:checked"
 COMMENT_SEL         = "textarea[id^='comment']"
 USERNAME_SEL        = "input[id^='username']"
 
+# javascript run inside the marking page to grab every student's details in one go
+# (one trip to the browser per question, rather than several per student).
+# the selectors above are passed in as [hdr, user, ans, mark, comm].
+# the result comes back as one json string (read with orjson), which is much quicker
+# for playwright to pass over than hundreds of separate little objects of answer text
+EXTRACT_STUDENTS_JS = """
+(els, [hdr, user, ans, mark, comm]) => JSON.stringify(els.map(el => ({
+    label: el.querySelector(hdr)?.innerText?.trim() ?? '',
+    sid:   el.querySelector(user)?.value ?? '',
+    ans:   el.querySelector(ans)?.innerText?.trim() ?? '',
+    mark:  el.querySelector(mark)?.innerText?.trim() ?? '',
+    com:   el.querySelector(comm)?.value?.trim() ?? '',
+})))
+"""
+FIELD_SELS = [HEADER_SEL, USERNAME_SEL, ANSWER_SEL, MARK_SEL, COMMENT_SEL]
+
+# javascript run inside the user's tab: download one marking page with the logged-in session
+# and read the students out of it with the code above. innerText only gives the on-screen
+# text for things that are actually drawn, so the student blocks (and the marking page's
+# own stylesheets) are put into a box that is drawn off the edge of the screen, and taken
+# out again straight after. the box is a shadow root, so those stylesheets don't restyle
+# the report page, and images/videos are dropped first as only the text is read
+FETCH_STUDENTS_JS = """
+async ([url, blocksSel, sels]) => {
+    const extract = """ + EXTRACT_STUDENTS_JS.strip() + """;
+    const resp = await fetch(url, {credentials: 'include'});
+    if (!resp.ok) return null;
+    const doc = new DOMParser().parseFromString(await resp.text(), 'text/html');
+    const blocks = [...doc.querySelectorAll(blocksSel)];
+    if (!blocks.length) return null;
+
+    const sheets = [...doc.querySelectorAll('link[rel~="stylesheet"][href], style')];
+    const loaded = sheets.filter(s => s.tagName === 'LINK').map(link => {
+        link.href = new URL(link.getAttribute('href'), url).href;
+        return new Promise(done => { link.onload = link.onerror = done; });
+    });
+    blocks.forEach(b => b.querySelectorAll('img, picture, video, audio, iframe, object, embed')
+        .forEach(e => e.remove()));
+
+    const host = document.createElement('div');
+    host.style.cssText = 'position:fixed; top:0; left:-10000px; width:1000px; pointer-events:none;';
+    host.attachShadow({mode: 'open'}).append(...sheets, ...blocks);
+    document.body.append(host);
+    try {
+        // the stylesheets come from the cache after the first question, but don't wait forever
+        await Promise.race([Promise.all(loaded), new Promise(done => setTimeout(done, 5000))]);
+        return extract(blocks, sels);
+    } finally {
+        host.remove();
+    }
+}
+"""
+
+# javascript run on every page load in the browser session - this is the only way to get
+# things onto examsys' own pages. it adds the floating "this is my exam" button and the
+# orange progress bar seen during extraction, and window.__updateProgress for python to
+# move the bar along. kept up here (rather than inside choose_and_extract) as it is only
+# added once, when the browser starts
+INIT_SCRIPT_JS = """
+(function(){
+    function ensureProgressBox(){
+        const total=parseInt(localStorage.getItem('totalQs')||'0');
+        const cur=parseInt(localStorage.getItem('currentQ')||'0');
+        const pct=total?Math.round((cur/total)*100):0;
+
+        let box=document.getElementById('__progress_box__');
+        if(!box){
+            box=document.createElement('div');
+            box.id='__progress_box__';
+            Object.assign(box.style,{
+                position:'fixed',bottom:'30px',right:'30px',
+                width:'260px',height:'85px',background:'#f57c00',
+                color:'white',padding:'1em',borderRadius:'10px',
+                fontFamily:'system-ui',zIndex:999999,
+                textAlign:'center',
+                boxShadow:'0 2px 6px rgba(0,0,0,0.3)',
+            });
+            box.innerHTML=`
+                <div id="__progress_txt__" style="font-size:15px;">
+                    ${pct>0?'Question '+cur+' of '+total+' ('+pct+'%)':'0%'}
+                </div>
+                <div style="background:white;height:8px;border-radius:5px;margin-top:8px;">
+                    <div id="__progress_fill__"
+                         style="height:8px;width:${pct}%;background:#4caf50;">
+                    </div>
+                </div>`;
+            document.body.appendChild(box);
+        } else {
+            let t=document.getElementById('__progress_txt__');
+            let f=document.getElementById('__progress_fill__');
+            if(t) t.textContent = pct>0 ? ('Question '+cur+' of '+total+' ('+pct+'%)') : '0%';
+            if(f) f.style.width = pct + '%';
+        }
+    }
+
+    function render(){
+        const extracting = localStorage.getItem('__EXTRACT_MODE__')==='1';
+        if(extracting){
+            const b=document.getElementById('__exam_btn__');
+            if(b) b.remove();
+            ensureProgressBox();
+            return;
+        }
+        if(!document.getElementById('__exam_btn__')){
+            const b=document.createElement('button');
+            b.id='__exam_btn__';
+            b.textContent='✅ This is my exam';
+            Object.assign(b.style,{
+                position:'fixed',bottom:'30px',right:'30px',
+                background:'green',color:'white',
+                padding:'1em 1.5em',fontSize:'18px',zIndex:999999,
+                borderRadius:'10px',cursor:'pointer',
+                boxShadow:'0 2px 6px rgba(0,0,0,0.3)',
+            });
+            b.onclick=()=>{
+                localStorage.setItem('__EXTRACT_MODE__','1');
+                localStorage.setItem('totalQs','0');
+                localStorage.setItem('currentQ','0');
+                b.remove();
+                if(window.examChosen) window.examChosen(window.location.href);
+                ensureProgressBox();
+            };
+            document.body.appendChild(b);
+        }
+    }
+
+    // called from python as each question finishes: store the new values (so they
+    // survive page loads) and redraw the box, without sending fresh code every time
+    window.__updateProgress=function(cur,total){
+        localStorage.setItem('totalQs',total);
+        localStorage.setItem('currentQ',cur);
+        ensureProgressBox();
+    };
+
+    document.addEventListener('DOMContentLoaded',render);
+    window.addEventListener('load',render);
+})();
+"""
+
 pw = browser = ctx = page = None # Placeholders for playwright browser objects
 
+MAX_CONCURRENCY = 5 # how many question pages are scraped at the same time
+VERBOSE = os.environ.get("VERBOSE", "0") == "1" # VERBOSE=1 to also show a line for every student on screen (the log file always has them)
+PROGRESS_INTERVAL = 0.5 # seconds between progress bar redraws in the browser
+BLOCKED_RESOURCES = {"image", "font", "media"} # never needed to read marks, so never downloaded in question tabs (styling is kept - see block_assets)
+
 
 # ------------------------------------------------------------
 # Suppress the resource_tracker semaphore warnings on macOS
@@ -77,24 +222,63 @@ APP_DIR.mkdir(parents=True, exist_ok=True) # creates folders if they don't alrea
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 DEFAULT_OUTPUT = str(APP_DIR / "exam_feedback_by_question.csv") # ensures output goes (and is called) somewhere/thing sensible if defaults not changed
+SESSION_FILE = APP_DIR / ".session.json" # saved examsys login cookies, so re-runs can skip the university login
+_TOOL_KEYS = {"__EXTRACT_MODE__", "totalQs", "currentQ"} # this tool's own localStorage values - never saved with the session
 
-def new_log_file() -> str:
+def new_log_file() -> Path:
     ts = time.strftime("%Y-%m-%d_%H-%M-%S")
-    return str(LOG_DIR / f"examsys_log_{ts}.txt") # Generate a new log file every run, timestamped file name
+    return LOG_DIR / f"examsys_log_{ts}.txt" # Generate a new log file every run, timestamped file name
+
+CURRENT_LOG_FILE: Path | None = None # will be set fresh on each extraction run, pointer for *this* extraction run
+
+# lines waiting to be shown in the on-screen log window. They are collected here and a
+# timer (see GUI layout) pushes them to the window in one go a few times a second, rather
+# than sending an update to the gui for every single student
+_log_buffer = []
+
+def flush_log(log_box):
+    """Move any buffered lines into the on-screen log window."""
+    for msg in _log_buffer:
+        log_box.push(msg.rstrip("\n")) # ui.log only sends the new line, not the whole log
+    _log_buffer.clear()
 
-CURRENT_LOG_FILE = None # will be set fresh on each extraction run, pointer for *this* extraction run
+_log_fh = None   # open handle on CURRENT_LOG_FILE, kept open for the whole run
+_log_fh_for = None # which CURRENT_LOG_FILE that handle belongs to
 
 def append_log(text: str):
     """Append text safely to the current log file for this run."""
-    global CURRENT_LOG_FILE
+    global CURRENT_LOG_FILE, _log_fh, _log_fh_for
     if not CURRENT_LOG_FILE:
         CURRENT_LOG_FILE = new_log_file()
     try:
-        with open(CURRENT_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(text) #appends to current log, does not overwrite. utf-8 allows non-ascii
+        # only (re)open the file when a new run has started a new log, rather than on every
+        # line - writes are then buffered in memory and hit the disk in 32KB chunks.
+        # (an identity check on the Path object, so no strings are built per call)
+        if _log_fh is None or _log_fh_for is not CURRENT_LOG_FILE:
+            close_log()
+            _log_fh = open(CURRENT_LOG_FILE, "a", encoding="utf-8", buffering=1 << 15)
+            _log_fh_for = CURRENT_LOG_FILE
+        _log_fh.write(text) #appends to current log, does not overwrite. utf-8 allows non-ascii
     except Exception as e:
         print("Log write failed:", e, file=sys.stderr) # fails gracefully without crashing app
 
+def close_log():
+    """Flush and close the held log file (end of each run, and on exit)."""
+    global _log_fh
+    if _log_fh:
+        try:
+            _log_fh.close()
+        except Exception as e:
+            print("Log close failed:", e, file=sys.stderr)
+        _log_fh = None
+
+atexit.register(close_log) # make sure the last buffered lines are written when the app exits
+
+def emit(msg: str):
+    """Send a message to both the on-screen log and this run's log file."""
+    _log_buffer.append(msg)
+    append_log(msg)
+
 
 # ------------------------------------------------------------
 # Helper functions
@@ -103,24 +287,37 @@ def append_log(text: str):
 # absolutize takes relative links for e.g. ".reports/textbox_marking.php?id=123" and converts into a safe
 # absolute URL which will not crash playwright (see base url definition above)
 
+_BASE    = EXAMSYS_BASE.rstrip('/') # worked out once here, rather than in every branch on every call
+_REPORTS = f"{_BASE}/reports"
+_REL_PREFIXES = ("../", "reports/", "textbox_marking") # relative forms that examsys report pages use
+
 def absolutize(href: str, base: str = EXAMSYS_BASE) -> str:
     if not href:
         return ""
     href = href.strip() # strips whitespace
     if href.startswith("http"):
         return href # if link starts with http, already absolute so do nothing
+    root, reports = (_BASE, _REPORTS) if base == EXAMSYS_BASE else (base.rstrip('/'), f"{base.rstrip('/')}/reports")
     if href.startswith("/"):
-        return f"{base.rstrip('/')}{href}" # handles site root paths
-    if href.startswith("../"):
-        return f"{base.rstrip('/')}/reports/{href.lstrip('../')}" # handles parent paths
-    if href.startswith("reports/"):
-        return f"{base.rstrip('/')}/{href}" # handles relative paths already starting with reports
-    if href.startswith("textbox_marking"):
-        return f"{base.rstrip('/')}/reports/{href}" # special case for handling empty file names
-    return f"{base.rstrip('/')}/{href.lstrip('/')}"
+        return f"{root}{href}" # handles site root paths
+    if href.startswith(_REL_PREFIXES): # one check for all the relative forms, then pick by first letter
+        if href[0] == ".":
+            # handles parent paths - slice off exactly one "../" (lstrip('../') would strip
+            # every leading '.' and '/', e.g. turning "../../x" and ".././x" into "x")
+            return f"{reports}/{href[3:]}"
+        if href[0] == "r":
+            return f"{root}/{href}" # handles relative paths already starting with reports
+        return f"{reports}/{href}" # special case for handling empty file names (textbox_marking...)
+    return f"{root}/{href.lstrip('/')}"
 
 
 # parse_mark_to_decimal forces 1/2 to be 0.5, to make .csv file play nicely with excel
+# it runs once per student per question, so the patterns are compiled once up here
+_NUM_RE        = re.compile(r"\d+(?:\.\d+)?")  # plain numbers like "2" or "1.5"
+_FRAC_RE       = re.compile(r"\d+\s*/\s*\d+")  # fractions like "1/2" or "3 / 2"
+_FRAC_SPLIT_RE = re.compile(r"\s*/\s*")
+_HALF = {str(d): f"{d}.5" for d in range(10)} # "1" -> "1.5" etc, for the usual single digit half marks
+
 def parse_mark_to_decimal(mark: str) -> str:
     """
     Convert marks like '1½' or '½' to '1.5' / '0.5' to avoid Excel weirdness.
@@ -129,7 +326,13 @@ def parse_mark_to_decimal(mark: str) -> str:
     if not mark:
         return "" # handles empty cells without falling over
     s = mark.strip()
+    if s.isdigit():
+        return s # whole marks like "2" - by far the most common case, no regex needed
     try:
+        # Plain numeric (e.g. "1.5")
+        if _NUM_RE.fullmatch(s):
+            return s # leaves plain numeric strings unchanged
+
         # handles the half-symbol format
         if "½" in s:
             if s == "½":
@@ -141,161 +344,253 @@ def parse_mark_to_decimal(mark: str) -> str:
                 return "0.5"
             # Some systems might show "1 ½"
             base = base.replace(" ", "")
+            if base in _HALF:
+                return _HALF[base]
             return str(float(base) + 0.5)
 
         # handle unformatted fractions like 1/2 or 3/2
-        if re.fullmatch(r"\d+\s*/\s*\d+", s):
-            num, den = re.split(r"\s*/\s*", s)
+        if _FRAC_RE.fullmatch(s):
+            num, den = _FRAC_SPLIT_RE.split(s, 1)
             den = float(den)
             if den != 0:
                 return str(float(num) / den)
 
-        # Plain numeric
-        if re.fullmatch(r"\d+(\.\d+)?", s):
-            return s # leaves plain numeric strings unchanged
-
         return s
     except Exception:
         return s
 
 
+# csv_chunk turns a question's rows into csv text, byte for byte what csv.writer would write
+# (quotes only around fields with a comma, quote or line break in, "" for quotes inside, and
+# \r\n line endings), but about twice as fast since most fields need no quoting at all
+_NEEDS_QUOTES = re.compile(r'[,"\r\n]').search
+
+def csv_chunk(rows) -> str:
+    out = []
+    for row in rows:
+        cols = []
+        for col in row:
+            col = str(col)
+            cols.append('"' + col.replace('"', '""') + '"' if _NEEDS_QUOTES(col) else col)
+        out.append(",".join(cols))
+        out.append("\r\n")
+    return "".join(out)
+
+
 # ------------------------------------------------------------
 # Extraction logic, function definition
 # ------------------------------------------------------------
 
 # this bit is the core scraper functionality, once you reach the "primary mark by question"
-# report page, it finds question links, visits each page, loops throug each student on page,
-# pulls out info, writes it all to a .csv, and updates the on-page progress bar as it goes.
+# report page, it finds question links, visits the question pages (a few at a time, each in
+# its own tab), loops through each student on page, pulls out info, writes it all to a .csv,
+# and updates the on-page progress bar as it goes.
+
+# block_assets is a network filter for the question tabs: images, fonts and videos are thrown
+# away before they download, as only the text on the page is read. the site's styling is
+# still loaded, because innerText reads the text as it is laid out on screen - without it,
+# text the site hides would be exported and line breaks would fall in different places
+async def block_assets(route):
+    if route.request.resource_type in BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# read_students_in_tab is the slower, sure-fire way to read a question: open its marking
+# page in a new tab of the shared browser session (ctx) and read the student blocks there.
+# new tabs take milliseconds, where launching a new browser per question would take seconds
+async def read_students_in_tab(ctx, qurl):
+    qpage = await ctx.new_page()
+    try:
+        # only on this question tab - the user's own tab keeps looking normal
+        await qpage.route("**/*", block_assets)
+
+        # pull out every student block on the page in one go
+        # a student block is essentially the individual page containing marks, answers, drop downs etc
+        async def read_students():
+            return orjson.loads(await qpage.eval_on_selector_all(STUDENT_BLOCKS_SEL, EXTRACT_STUDENTS_JS, FIELD_SELS))
+
+        # open the marking page for this question. the marking pages are built on the
+        # server, so the student blocks are normally already there once the html has
+        # loaded - only if none are found yet do we sit and wait for them to appear
+        await qpage.goto(qurl, wait_until="domcontentloaded")
+        students = await read_students()
+        if not students:
+            await qpage.wait_for_selector(STUDENT_BLOCKS_SEL, state="attached", timeout=10000)
+            students = await read_students()
+        return students
+
+    # close just this tab (not the browser session) when the question is done
+    finally:
+        await qpage.close()
+
+
+# process_question handles a single question page and returns that question's rows as csv
+# text ("" if the page could not be read). the marking pages are plain html built on the
+# server, so first it just downloads the page from inside the user's tab (page) and reads the
+# student blocks there, off screen - no new tab, no page scripts. only if that finds no
+# students does it fall back to opening the page properly in a tab
+async def process_question(ctx, page, qi, qurl, total_qs, sem, stats):
+    # the semaphore caps how many questions are loading at once, so examsys isn't hammered
+    async with sem:
+        stats['questions'] += 1
+        emit(f"\n➡️ Processing Question {qi}/{total_qs}\n")
+
+        students = None
+        try:
+            raw = await page.evaluate(FETCH_STUDENTS_JS, [qurl, STUDENT_BLOCKS_SEL, FIELD_SELS])
+            students = orjson.loads(raw) if raw else None
+        except Exception as e:
+            append_log(f"Direct fetch failed for {qurl}, opening in a tab instead: {e}\n")
+
+        if not students:
+            try:
+                students = await read_students_in_tab(ctx, qurl)
+
+            # if search times out and page fails to load, log error and move on
+            except Exception as e:
+                emit(f"⚠️ Question {qi}: failed to open {qurl}: {e}\n")
+                return ""
+
+        stats['students'] = max(stats['students'], len(students)) # biggest class seen on any question
+        emit(f"🧑‍🎓 Question {qi}: found {len(students)} students\n") # questions run side by side, so say which
+
+        # process each student answer, collecting this question's rows
+        rows = []
+        for si, r in enumerate(students):
+            # use visible student label (else create a fallback by adding 1 to previous student)
+            label = r['label'] or f"Student {si+1}"
+            sid, ans, com = r['sid'], r['ans'], r['com']
+
+            # convert 1/2 marks to decimals
+            mark = parse_mark_to_decimal(r['mark'])
+
+            # one row for the csv file for this student, and this question (i.e. student 3, question 1)
+            rows.append([qi, sid, label, mark, com, ans])
+
+            # log a short confirmation message, but not full answers. it always goes in the log file,
+            # but only on screen when VERBOSE is on - on a big exam this one line per student would
+            # swamp the on-screen log
+            msg = (
+                f"  ✅ Q{qi} {label} ({sid}) | mark={mark} | "
+                f"ans={len(ans)} chars | comm={len(com)} chars\n"
+            )
+            if VERBOSE:
+                _log_buffer.append(msg)
+            append_log(msg)
 
-async def extract_feedback(report_url: str, output_path: str, log_box):
-    global page
+        # format the whole question's rows as csv text here, so the csv writer
+        # gets it as one chunk (and the file gets one write per question)
+        stats['rows'] += len(rows)
+        return csv_chunk(rows)
+
+
+# ctx is the shared browser session, page is the user's own tab (left on the report page
+# so the progress bar stays visible), question pages are fetched from it (see process_question)
+async def extract_feedback(ctx, page, report_url: str, output_path: str):
 
     append_log("\n=== Extraction Started ===\n") # record in the log that the extraction has started
     append_log(f"Report URL: {report_url}\n") # note the report URL (i.e. what exam it is!)
 
     start = time.perf_counter() # start a timer (useful for debugging if extraction takes ages for e.g.)
 
+    # running totals for the summary panel, counted as we go (questions processed,
+    # most students on any one question, rows written to the csv)
+    stats = {'questions': 0, 'students': 0, 'rows': 0}
+
     try:
-        await page.goto(report_url, wait_until="domcontentloaded") # open primary mark by q page in browser
+        # open primary mark by q page in browser - unless the tab is already sitting on it (it
+        # normally is, choose_and_extract has just gone there), so it isn't loaded twice
+        if page.url != report_url:
+            await page.goto(report_url, wait_until="domcontentloaded")
         title = await page.title()
-        msg = f"📄 Page title: {title}\n"
-        log_box.value += msg
-        append_log(msg) # append page title to log
+        emit(f"📄 Page title: {title}\n") # append page title to log
 
-        # find all links to individual question marking pages - these are usually relative links buried in the html
+        # find all links to individual question marking pages - these are usually relative links buried in the html.
+        # QUESTION_LINK_SEL only matches links whose href contains textbox_marking.php, so every
+        # href handed back is already a question link and needs no filtering here
         hrefs = await page.eval_on_selector_all(
             QUESTION_LINK_SEL,
-            "els => els.map(e => e.getAttribute('href')).filter(Boolean)" # this bit is the javascript code to extract href attributes (web address)
+            "els => els.map(e => e.getAttribute('href'))" # this bit is the javascript code to extract href attributes (web address)
         )
 
-        # convert all the relative urls into absolute
-        question_urls = [absolutize(h) for h in hrefs if h and 'textbox_marking' in h]
+        # convert all the relative urls into absolute, dropping repeats (examsys sometimes shows
+        # the same link twice, e.g. for multi-part questions) but keeping the page order
+        question_urls = list(dict.fromkeys(absolutize(h) for h in hrefs))
 
         # stop and throw an error if no questions are found
         if not question_urls:
-            msg = "⚠️ No questions found.\n"
-            log_box.value += msg
-            append_log(msg)
-            return None
+            emit("⚠️ No questions found.\n")
+            return None, stats
 
         # count the number of questions to be processed
         total_qs = len(question_urls)
-        msg = f"✅ Found {total_qs} questions.\n"
-        log_box.value += msg
-        append_log(msg)
+        emit(f"✅ Found {total_qs} questions.\n")
 
         # store progress values so that the progress bar will function
         # without this, the bar resets to 0 every time a page is refreshed/loaded
-        await page.evaluate(f"""
-            localStorage.setItem('totalQs', {total_qs});
-            localStorage.setItem('currentQ', 0);
-        """)
+        await page.evaluate("([c, t]) => window.__updateProgress(c, t)", [0, total_qs])
 
         # check that the output directory exists
         out_path = Path(output_path)
         out_path.parent.mkdir(parents=True, exist_ok=True)
 
         # open the blank .csv file and write the column headers
-        with open(out_path, "w", newline="", encoding="utf-8") as f:
+        # (big 1MB buffer, so rows are written to disk in large chunks rather than line by line)
+        with open(out_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
             writer = csv.writer(f)
             writer.writerow(["question_number","student_id","student_label",
                              "mark","comment","student_answer"])
 
-            # process each question, one at a time, looping through them all (starting at 1),
-            # and updating on-screen progress message and log
-            for qi, qurl in enumerate(question_urls, 1):
-                msg = f"\n➡️ Processing Question {qi}/{total_qs}\n"
-                log_box.value += msg
-                append_log(msg)
-
-
-                # update the progress bar display in browswer with % and fill
-                await page.evaluate(f"""
-                    localStorage.setItem('currentQ', {qi});
-                    const total = {total_qs};
-                    const pct = Math.round(({qi}/total)*100);
-                    let txt=document.getElementById('__progress_txt__');
-                    let fill=document.getElementById('__progress_fill__');
-                    if(txt) txt.textContent = 'Question {qi} of {total_qs} ('+pct+'%)';
-                    if(fill) fill.style.width = pct + '%';
-                """)
-
-                # open the marking page for current question in outer loop, wait for search
-                try:
-                    await page.goto(qurl, wait_until="domcontentloaded")
-                    await page.wait_for_selector(STUDENT_BLOCKS_SEL, timeout=10000)
-
-                # if search times out and page fails to load, log error and move on 
-                except Exception as e:
-                    err = f"⚠️ Failed to open {qurl}: {e}\n"
-                    log_box.value += err
-                    append_log(err)
-                    continue
-
-                # find all student blocks on the page
-                # a student block is essentially the individual page containing marks, answers, drop downs etc  
-                blocks = page.locator(STUDENT_BLOCKS_SEL)
-                count = await blocks.count()
-                msg = f"🧑‍🎓 Found {count} students\n"
-                log_box.value += msg
-                append_log(msg)
-
-                # process each student answer
-                for si in range(count):
-                    b = blocks.nth(si)
-
-                    # extract visible student label (else create a fallback by adding 1 to previous student)
-                    label = (await b.locator(HEADER_SEL).inner_text()).strip() \
-                            if await b.locator(HEADER_SEL).count() else f"Student {si+1}"
-
-                    # extract student identifier (student number)
-                    sid = (await b.locator(USERNAME_SEL).get_attribute("value")) or ""
-                    ans = (await b.locator(ANSWER_SEL).inner_text()).strip() \
-                          if await b.locator(ANSWER_SEL).count() else ""
-
-                    # extract the selected mark, and convert 1/2 marks to decimals
-                    mark_raw = (await b.locator(MARK_SEL).inner_text()).strip() \
-                           if await b.locator(MARK_SEL).count() else ""
-                    mark = parse_mark_to_decimal(mark_raw)
-
-                    # extract the feedback comment
-                    com = (await b.locator(COMMENT_SEL).input_value()).strip() \
-                           if await b.locator(COMMENT_SEL).count() else ""
-
-                    # write one row to the csv file for this student, and this question (i.e. student 3, question 1)
-                    writer.writerow([qi, sid, label, mark, com, ans])
-
-                    # log a short confirmation message, but not full answers
-                    msg = (
-                        f"  ✅ {label} ({sid}) | mark={mark} | "
-                        f"ans={len(ans)} chars | comm={len(com)} chars\n"
-                    )
-                    log_box.value += msg
-                    append_log(msg)
-
-                # return to the main report page before navigating to the next question
-                await page.goto(report_url, wait_until="domcontentloaded")
-                await asyncio.sleep(0.25)
+            # each question's ready-made csv text goes through this queue as (question number, text),
+            # and only the csv_writer below actually writes to the file (one writer, no clashes).
+            # questions finish in any order, so the writer holds on to early finishers until
+            # the ones before them are written - the csv always comes out in question order.
+            # the writer runs in its own thread (so it's a thread-safe queue), which means
+            # the questions never wait on the disk
+            out_queue = queue.SimpleQueue()
+
+            def csv_writer():
+                pending = {}
+                next_q = 1
+                while (item := out_queue.get()) is not None:
+                    qi, chunk = item
+                    pending[qi] = chunk
+                    while next_q in pending:
+                        f.write(pending.pop(next_q))
+                        next_q += 1
+                # if the run stopped part way through, still write whatever did finish
+                for qi in sorted(pending):
+                    f.write(pending[qi])
+
+            writer_task = asyncio.create_task(asyncio.to_thread(csv_writer))
+
+            # once a question has finished, bump the progress bar display in browser with % and fill.
+            # this is only redrawn every half a second or so (plus the first and last question),
+            # so big exams don't spend a browser round trip per question on the orange box
+            sem = asyncio.Semaphore(MAX_CONCURRENCY)
+            done_qs = 0
+            last_progress = 0.0
+
+            async def run_question(qi, qurl):
+                nonlocal done_qs, last_progress
+                chunk = await process_question(ctx, page, qi, qurl, total_qs, sem, stats)
+                out_queue.put((qi, chunk))
+                done_qs += 1
+                now = time.monotonic()
+                if done_qs in (1, total_qs) or now - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = now
+                    # (window.__updateProgress is defined once in INIT_SCRIPT_JS)
+                    await page.evaluate("([c, t]) => window.__updateProgress(c, t)", [done_qs, total_qs])
+
+            # process all the questions, a few at a time (see MAX_CONCURRENCY), numbering them from 1
+            try:
+                await asyncio.gather(*(run_question(qi, qurl) for qi, qurl in enumerate(question_urls, 1)))
+            finally:
+                # tell the writer there are no more rows, and let it finish up
+                out_queue.put(None)
+                await writer_task
 
         # update progress bar to display that extraction is complete
         await page.evaluate("""
@@ -307,16 +602,14 @@ async def extract_feedback(report_url: str, output_path: str, log_box):
 
         # calculate total extraction time and note in log (as well as "done" message)
         elapsed = time.perf_counter() - start
-        msg = f"\n🎉 Done → {out_path}\n"
-        log_box.value += msg
-        append_log(msg)
+        emit(f"\n🎉 Done → {out_path}\n")
         append_log(f"Elapsed time: {elapsed:.2f}s\n")
 
         # notify that csv has been saved, and give location of save
         ui.notify(f"CSV saved: {out_path.name}", type="positive")
         ui.download(str(out_path), filename=out_path.name)
 
-        return elapsed
+        return elapsed, stats
 
     except Exception:
         # if anything funky happens, note full error in log
@@ -326,123 +619,83 @@ async def extract_feedback(report_url: str, output_path: str, log_box):
 
 
 # ------------------------------------------------------------
-# Parse summary from log function definition
+# Workflow functions: open browser, user chooses exam, perform extract logic
 # ------------------------------------------------------------
 
-# read log and count how many questions were processed, how many students, how many
-# rows written to csv. Only uses log, not the webpage or the csv file itself, thid
+# save_session writes the browser session's cookies to SESSION_FILE, so the next run can
+# start already logged in. this tool's own button/progress values are left out, otherwise
+# the next run would open in "extracting" mode with no exam button
+async def save_session(ctx):
+    try:
+        state = await ctx.storage_state()
+        for origin in state.get("origins", []):
+            origin["localStorage"] = [kv for kv in origin["localStorage"] if kv["name"] not in _TOOL_KEYS]
+        # login cookies - created readable by this user only from the very start (not
+        # chmod-ed afterwards, which would leave a moment where anyone could read them)
+        fd = os.open(SESSION_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, 0o600) # a file left by an older version keeps its old mode otherwise
+            fh.write(orjson.dumps(state))
+        append_log("Login session saved\n")
+    except Exception:
+        append_log("Could not save login session:\n")
+        append_log(traceback.format_exc())
 
-def parse_summary_from_log(log_text: str):
-    q_matches = re.findall(r"^➡️ Processing Question", log_text, flags=re.MULTILINE)
-    total_questions = len(q_matches)
 
-    student_matches = re.findall(r"Found (\d+) students", log_text)
-    total_students = max(map(int, student_matches)) if student_matches else 0
+# ensure_browser starts playwright, a visible chrome browser and one browser session (ctx)
+# the first time an extraction is run, and then keeps them open for every run after that,
+# so only the first run pays the few seconds it takes to start chrome. if the user has
+# closed the chrome window in between, everything is started again from scratch
+async def ensure_browser():
+    global pw, browser, ctx
+    if browser and browser.is_connected():
+        return
 
-    row_matches = re.findall(r"^\s*✅ ", log_text, flags=re.MULTILINE)
-    total_rows = len(row_matches)
+    # tidy up whatever is left of a browser the user closed
+    try:
+        if pw:
+            await pw.stop()
+    except Exception:
+        append_log("Error while stopping old Playwright:\n")
+        append_log(traceback.format_exc())
 
-    return total_questions, total_students, total_rows
+    append_log("Starting browser...\n")
+    pw = await async_playwright().start()
+    browser = await pw.chromium.launch(channel="chrome", headless=False)
+    ctx = None
+    # if an earlier run saved its login, start the session from it - while examsys still
+    # accepts it the login page is skipped, and if it has run out examsys just sends the
+    # user to the normal login again
+    if SESSION_FILE.exists():
+        try:
+            ctx = await browser.new_context(storage_state=SESSION_FILE)
+            append_log("Reusing saved login session\n")
+        except Exception:
+            append_log("Saved login session unreadable, starting fresh:\n")
+            append_log(traceback.format_exc())
+    if ctx is None:
+        ctx = await browser.new_context()
 
+    # add the exam button + progress bar to every page in the session (see INIT_SCRIPT_JS)
+    await ctx.add_init_script(INIT_SCRIPT_JS)
 
-# ------------------------------------------------------------
-# Workflow functions: open browser, user chooses exam, perform extract logic
-# ------------------------------------------------------------
 
-async def choose_and_extract(log_box, output_input, summary_labels):
-    # these are the shared playwright objects used across the app
-    # playwright controller, browser, browser session, and active tab/page
-    global pw, browser, ctx, page, CURRENT_LOG_FILE
+async def choose_and_extract(output_input, summary_labels):
+    # this run's tab (the browser and session it lives in are set up by ensure_browser),
+    # and this run's log file
+    global page, CURRENT_LOG_FILE
 
     # New log file for this extraction run - start a new file so that each
     # extraction run has it's own timestamped log gile
     CURRENT_LOG_FILE = new_log_file()
     append_log(f"=== New Extraction Session: {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n")
 
-    # Start playwright (browser automation), launch a visible chrome browswer,
-    # create a fresh context (browser session), and open a new tab
-    pw = await async_playwright().start()
-    browser = await pw.chromium.launch(channel="chrome", headless=False)
-    ctx = await browser.new_context()
+    # start the browser the first time round (it is then kept open between runs),
+    # and open a fresh tab for this run
+    await ensure_browser()
     page = await ctx.new_page()
 
-    # inject exam button + progress bar - this only works with javascript which
-    # runs on every page load in the browser session. This is for a floating
-    # "this is my exam" button, and the orange progress bar seen during extraction
-
-    await ctx.add_init_script("""
-        (function(){
-            function ensureProgressBox(){
-                const total=parseInt(localStorage.getItem('totalQs')||'0');
-                const cur=parseInt(localStorage.getItem('currentQ')||'0');
-                const pct=total?Math.round((cur/total)*100):0;
-
-                let box=document.getElementById('__progress_box__');
-                if(!box){
-                    box=document.createElement('div');
-                    box.id='__progress_box__';
-                    Object.assign(box.style,{
-                        position:'fixed',bottom:'30px',right:'30px',
-                        width:'260px',height:'85px',background:'#f57c00',
-                        color:'white',padding:'1em',borderRadius:'10px',
-                        fontFamily:'system-ui',zIndex:999999,
-                        textAlign:'center',
-                        boxShadow:'0 2px 6px rgba(0,0,0,0.3)',
-                    });
-                    box.innerHTML=`
-                        <div id="__progress_txt__" style="font-size:15px;">
-                            ${pct>0?'Question '+cur+' of '+total+' ('+pct+'%)':'0%'}
-                        </div>
-                        <div style="background:white;height:8px;border-radius:5px;margin-top:8px;">
-                            <div id="__progress_fill__"
-                                 style="height:8px;width:${pct}%;background:#4caf50;">
-                            </div>
-                        </div>`;
-                    document.body.appendChild(box);
-                } else {
-                    let t=document.getElementById('__progress_txt__');
-                    let f=document.getElementById('__progress_fill__');
-                    if(t) t.textContent = pct>0 ? ('Question '+cur+' of '+total+' ('+pct+'%)') : '0%';
-                    if(f) f.style.width = pct + '%';
-                }
-            }
-
-            function render(){
-                const extracting = localStorage.getItem('__EXTRACT_MODE__')==='1';
-                if(extracting){
-                    const b=document.getElementById('__exam_btn__');
-                    if(b) b.remove();
-                    ensureProgressBox();
-                    return;
-                }
-                if(!document.getElementById('__exam_btn__')){
-                    const b=document.createElement('button');
-                    b.id='__exam_btn__';
-                    b.textContent='✅ This is my exam';
-                    Object.assign(b.style,{
-                        position:'fixed',bottom:'30px',right:'30px',
-                        background:'green',color:'white',
-                        padding:'1em 1.5em',fontSize:'18px',zIndex:999999,
-                        borderRadius:'10px',cursor:'pointer',
-                        boxShadow:'0 2px 6px rgba(0,0,0,0.3)',
-                    });
-                    b.onclick=()=>{
-                        localStorage.setItem('__EXTRACT_MODE__','1');
-                        localStorage.setItem('totalQs','0');
-                        localStorage.setItem('currentQ','0');
-                        b.remove();
-                        if(window.examChosen) window.examChosen(window.location.href);
-                        ensureProgressBox();
-                    };
-                    document.body.appendChild(b);
-                }
-            }
-
-            document.addEventListener('DOMContentLoaded',render);
-            window.addEventListener('load',render);
-        })();
-    """)
-
     try:
         # do nothing until user clicks "this is my exam" button in browser instance
         exam_future = asyncio.Future()
@@ -452,55 +705,69 @@ async def choose_and_extract(log_box, output_input, summary_labels):
         await page.expose_function("examChosen", lambda url: exam_future.set_result(url))
 
         # tells the user whats happening (on screen and in log file)
-        msg = "🔐 Opening ExamSys login page...\n"
-        log_box.value += msg
-        append_log(msg)
+        emit("🔐 Opening ExamSys login page...\n")
+
+        # the browser session outlives each run, so first forget any button/progress state an
+        # earlier run left behind (e.g. its tab was closed part way through) - otherwise this
+        # tab would open with no exam button. a blank examsys page is served from here for
+        # this, so examsys' localStorage can be reached without asking the server for anything
+        reset_url = f"{EXAMSYS_BASE}/__extractor_reset__"
+        await page.route(reset_url, lambda route: route.fulfill(body="", content_type="text/html"))
+        await page.goto(reset_url)
+        await page.evaluate("keys => keys.forEach(k => localStorage.removeItem(k))", list(_TOOL_KEYS))
+        await page.unroute(reset_url)
 
         # open examsys to allow the user to manually log in with university credentials
-        # THESE CREDENTIALS ARE NOT STORED ANYWHERE
+        # THESE CREDENTIALS ARE NOT STORED ANYWHERE (only examsys' login cookie is kept, in SESSION_FILE)
         await page.goto(EXAMSYS_BASE)
 
         # instructions
-        msg = "🌐 Log in, navigate to exam, then click ‘This is my exam’.\n"
-        log_box.value += msg
-        append_log(msg)
+        emit("🌐 Log in, navigate to exam, then click ‘This is my exam’.\n")
 
         # wait until user clicks "This is my exam" button
         # the click triggers examChosen(...) and sets exam_future().
         chosen_url = await exam_future
         msg = f"✅ Exam selected:\n{chosen_url}\n"
-        log_box.value += msg
+        _log_buffer.append(msg)
         append_log(f"Exam chosen: {chosen_url}\n")
 
-        # after exam is selected, click through examsys menus to reach the primary
-        # mark by question report page
-        await page.click("a:has-text('Reports')")
-        await page.click("a:has-text('Primary Mark by Question')")
-        await page.wait_for_load_state("domcontentloaded")
+        # the user is definitely logged in by now, so save the session for next time
+        await save_session(ctx)
+
+        # after exam is selected, get to the primary mark by question report page.
+        # if the report link is already sitting in the page (menus are often just hidden),
+        # one quick look in the browser finds its address and we go straight there -
+        # otherwise click through the examsys menus as a person would
+        report_href = await page.evaluate("""text => {
+            const a = [...document.querySelectorAll('a')].find(a => a.textContent.includes(text));
+            const href = a?.getAttribute('href') || '';
+            return (href && !href.startsWith('#') && !href.startsWith('javascript:')) ? a.href : '';
+        }""", "Primary Mark by Question")
+        if report_href:
+            await page.goto(report_href, wait_until="domcontentloaded")
+        else:
+            await page.click("a:has-text('Reports')")
+            await page.click("a:has-text('Primary Mark by Question')")
+            await page.wait_for_load_state("domcontentloaded")
 
         # store the report URL (i.e. the page containing the links to each question)
         report_url = page.url
         msg = f"📄 Report page:\n{report_url}\n"
-        log_box.value += msg
+        _log_buffer.append(msg)
         append_log(f"Primary Mark by Question URL: {report_url}\n")
 
-        msg = "🚀 Starting extraction...\n"
-        log_box.value += msg
-        append_log(msg)
+        emit("🚀 Starting extraction...\n")
 
         # run main extraction function, creating .csv file
-        elapsed = await extract_feedback(report_url, output_input.value, log_box)
-
-        # parse log summary for numbers
-        tq, ts, tr = parse_summary_from_log(log_box.value)
+        elapsed, stats = await extract_feedback(ctx, page, report_url, output_input.value)
 
-        # update summary table
-        summary_labels['questions'].text = str(tq)
-        summary_labels['students'].text = str(ts)
-        summary_labels['rows'].text = str(tr)
+        # update summary table with the totals counted during extraction
+        summary_labels['questions'].text = str(stats['questions'])
+        summary_labels['students'].text = str(stats['students'])
+        summary_labels['rows'].text = str(stats['rows'])
         summary_labels['file'].text = os.path.basename(output_input.value)
         summary_labels['path'].text = os.path.abspath(output_input.value)
-        summary_labels['duration'].text = f"{elapsed:.1f}s"
+        summary_labels['duration'].text = f"{elapsed:.1f}s" if elapsed is not None else "–"
 
         append_log("Summary updated\n")
 
@@ -511,36 +778,32 @@ async def choose_and_extract(log_box, output_input, summary_labels):
         raise
 
     finally:
-        # always close the browser, even if an error has occurred
-        append_log("Closing Playwright...\n")
+        # always close this run's tab, even if an error has occurred. the browser itself stays
+        # open (see ensure_browser) so the next run starts straight away - it is only shut
+        # down when the app is closed (see shutdown_server)
+        append_log("Closing extraction tab...\n")
 
-        # close context (browser session) and browser cleanly
+        # tidy away this run's button/progress state too, so other examsys tabs in the browser
+        # don't keep showing the progress box (the next run clears it again anyway)
         try:
-            if ctx:
-                await ctx.close()
+            if not page.is_closed():
+                await page.evaluate("keys => keys.forEach(k => localStorage.removeItem(k))", list(_TOOL_KEYS))
         except Exception:
-            append_log("Error while closing context:\n")
+            append_log("Error while clearing extraction state:\n")
             append_log(traceback.format_exc())
 
+        # closed separately, so a failed tidy-up above can't leave the tab open
         try:
-            if browser:
-                await browser.close()
+            await page.close()
         except Exception:
-            append_log("Error while closing browser:\n")
+            append_log("Error while closing extraction tab:\n")
             append_log(traceback.format_exc())
 
-        # stop playwright instance
-        try:
-            if pw:
-                await pw.stop()   # Playwright uses stop(), not close()
-        except Exception:
-            append_log("Error while stopping Playwright:\n")
-            append_log(traceback.format_exc())
-
-        # notify user of completed extraction and browser close
-        ui.notify("Extraction complete — browser closed", type="positive")
-        log_box.value += "\n✅ Browser and session closed.\n"
-        append_log("Browser and session closed.\n")
+        # notify user of completed extraction
+        ui.notify("Extraction complete", type="positive")
+        _log_buffer.append("\n✅ Extraction tab closed.\n")
+        append_log("Extraction tab closed.\n")
+        close_log() # flush this run's log to disk
 
 
 # ------------------------------------------------------------
@@ -550,9 +813,9 @@ async def choose_and_extract(log_box, output_input, summary_labels):
 # this whole section builds the gui, defining the layout and appearance
 # of the app window, including header, buttons, logs, summary etc.
 
-# this is custom header and associated styling in the top banner
-ui.html("""
-<style>
+# all of the app's styling, added once to the page <head> (rather than as <style> blocks
+# sitting in the page itself) - the banner headers, and the summary panel grid
+ui.add_css("""
   .fullwidth-header {
     position: fixed;
     top: 0;
@@ -583,8 +846,28 @@ ui.html("""
     box-sizing: border-box;
   }
   body { margin: 0; }
-</style>
 
+  /* summary panel */
+  .summary-grid {
+    display: grid;
+    grid-template-columns: 1fr 1fr;
+    gap: 6px 18px;
+    font-size: 0.85rem;
+    color: #334155;
+    align-items: center;
+  }
+  .summary-label { opacity: 0.8; }
+  .summary-value { text-align: right; }
+  .summary-footer {
+    margin-top: 8px;
+    font-size: 0.8rem;
+    color: #475569;
+    line-height: 1.25;
+  }
+""")
+
+# this is custom header in the top banner
+ui.html("""
 <div class="fullwidth-header">
   🦊 FOXES: ExamSys Feedback Extractor
 </div>
@@ -611,16 +894,11 @@ with ui.card().classes("w-full mt-3 p-4"):
         "Click the button below, then log in, choose your exam, and press ‘This is my exam’."
     ).classes("text-sm text-gray-700 mb-3")
 
-    def autoscroll(): # autoscroll logic for log window
-        ui.run_javascript(
-            f"const el=document.querySelector('#{log.id}');"
-            " if(el) el.scrollTop=el.scrollHeight;"
-        )
-
-    async def start(): # start button logic; clears log, scrolls to bottom, starts extraction workflow
-        log.value = "🌐 Opening ExamSys login page…\n"
-        autoscroll()
-        await choose_and_extract(log, output_in, summary_labels)
+    async def start(): # start button logic; clears log, starts extraction workflow
+        _log_buffer.clear()
+        log.clear()
+        log.push("🌐 Opening ExamSys login page…")
+        await choose_and_extract(output_in, summary_labels)
 
     ui.button( # "go" button for app
         "Login → Choose Exam → Extract",
@@ -632,28 +910,6 @@ with ui.card().classes("w-full mt-3 p-4"):
 with ui.card().classes("w-full mt-3 p-3"):
     ui.label("Extraction Summary").classes("text-md font-semibold mb-2 text-[#7c2d12]")
 
-    # summary grid layout definition
-    ui.html("""
-    <style>
-        .summary-grid {
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 6px 18px;
-            font-size: 0.85rem;
-            color: #334155;
-            align-items: center;
-        }
-        .summary-label { opacity: 0.8; }
-        .summary-value { text-align: right; }
-        .summary-footer {
-            margin-top: 8px;
-            font-size: 0.8rem;
-            color: #475569;
-            line-height: 1.25;
-        }
-    </style>
-    """, sanitize=False)
-
     # summary labels dictionary, storing references to each field for dynamic updating later
     with ui.element("div").classes("summary-grid"):
         ui.label("Total questions:").classes("summary-label")
@@ -679,14 +935,16 @@ with ui.card().classes("w-full mt-3 p-3"):
 
 # log window
 with ui.expansion('Extraction Log', value=False).classes("mt-3 w-full"):
-    log = ui.textarea().classes("w-full h-[34rem] text-base").style("resize:none;overflow-y:scroll;")
-    log.on('update:model-value', lambda _: autoscroll())
+    # ui.log is append-only: each new line is sent to the window on its own (a textarea resends
+    # the entire log every time), it keeps itself scrolled to the bottom, and only holds the
+    # last 5000 lines on screen - the full log is always in the log file
+    log = ui.log(max_lines=5000).classes("w-full h-[34rem] text-base").style("overflow-y:scroll;")
+    ui.timer(0.2, lambda: flush_log(log)) # push buffered log lines to the window 5x a second
 
 # close app button (painful to make)
 
 # define shutdown function
 async def shutdown_server():
-    global pw, browser, ctx
     # add user requested shutdown request to log
     append_log("Shutdown requested by user via Close App button.\n")
 
@@ -700,16 +958,9 @@ async def shutdown_server():
         }
     """)
 
-    # close browser session, ensuring login session for examsys closes
-    # and no background state is left hanging
-    try:
-        if ctx:
-            await ctx.close()
-    except Exception:
-        append_log("Error while closing context in shutdown_server:\n")
-        append_log(traceback.format_exc())
-
-    # close browswer itself
+    # close the browser, ensuring login session for examsys closes and no background
+    # state is left hanging (closing the browser closes every session/tab in it too,
+    # so there is no need to close ctx on its own first)
     try:
         if browser:
             await browser.close()
@@ -727,6 +978,7 @@ async def shutdown_server():
 
     # small pause, then force exit (pause stops things falling over and allows cleanup to finish)
     await asyncio.sleep(0.3)
+    close_log() # os._exit skips atexit, so flush the log by hand first
     os._exit(0)
 
 # create button itself in gui window